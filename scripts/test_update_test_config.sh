@@ -39,6 +39,41 @@ else
 fi
 echo
 
+# Test 5: Check-fast mode stops at the first missing field
+echo "Test 5: Check-fast mode with hypothetical field"
+status=0
+output=$(python3 "$TEST_SCRIPT" --field test_hypothetical_field --value '"test_value"' --check-fast 2>&1) || status=$?
+if [ "$status" -eq 1 ] && [ "$(echo "$output" | grep -c "Missing field")" -eq 1 ]; then
+    echo "✓ Check-fast mode exits 1 after reporting a single missing field"
+else
+    echo "✗ Check-fast mode did not stop at the first missing field (exit $status)"
+    exit 1
+fi
+echo
+
+# Test 6: Incremental mode falls back to all files when the base revision is invalid
+echo "Test 6: Incremental mode with invalid base revision"
+if python3 "$TEST_SCRIPT" --field test_hypothetical_field --value '"test_value"' \
+        --incremental --base not-a-real-revision --dry-run 2>&1 \
+        | grep -q "could not query git for changes against not-a-real-revision"; then
+    echo "✓ Incremental mode warns and falls back to a full scan"
+else
+    echo "✗ Incremental mode did not fall back for an invalid base revision"
+    exit 1
+fi
+echo
+
+# Test 7: Dry run bypassing the result cache
+echo "Test 7: Dry run with --no-cache"
+if python3 "$TEST_SCRIPT" --field test_hypothetical_field --value '"test_value"' \
+        --no-cache --dry-run 2>&1 | grep -q "Would modify"; then
+    echo "✓ Dry run without the cache reports files to modify"
+else
+    echo "✗ Dry run with --no-cache reported no changes"
+    exit 1
+fi
+echo
+
 echo "=== All tests passed! ==="
 echo
 echo "The update_test_config.py script is working correctly."
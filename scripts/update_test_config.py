@@ -26,15 +26,331 @@ Examples:
 """
 
 import argparse
+import contextlib
+import functools
+import io
+import mmap
+import os
 import re
+import subprocess
 import sys
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, Set, Tuple, Optional, Union
+
+# Modules only needed by some modes (json, hashlib, shutil, difflib,
+# concurrent.futures) are imported where they are used to keep startup fast.
+
+# Literal every declaration contains; a plain substring test on it is much
+# cheaper than running DEFAULT_RE over files that have no declarations. Kept as
+# bytes so it can be searched for in a mapped file before decoding it.
+DEFAULT_MARKER = b'AppSettings::default()'
+
+# Compiled once at import time rather than once per file scanned. The pattern is
+# searched over the whole file, so whitespace is kept to one line to match only
+# declarations written on a single line.
+DEFAULT_RE = re.compile(
+    r'let[^\S\n]+(?:mut[^\S\n]+)?(?P<var>\w+)[^\S\n]*=[^\S\n]*AppSettings::default\(\)'
+)
+
+# A block of field assignments ends at a line starting with one of these (after
+# indentation) or at an empty line. Plain string tests beat a regex here.
+BOUNDARY_PREFIXES = ('let ', 'fn ', '#[')
+
+# Files are processed concurrently. Their regular output is buffered and
+# printed in order afterwards, but errors are reported as they happen; hold this
+# while printing one so tracebacks from different files are not interleaved.
+_print_lock = threading.Lock()
+
+# Cache of files known to need no change, relative to the repository root.
+# Maps each resolved file path to the cache_key() of the run that left it as is.
+CACHE_FILE = Path('target') / '.update_test_config_cache.json'
+
+# Editing this script must invalidate every cached result.
+_SCRIPT_MTIME = os.stat(__file__).st_mtime_ns
+
+# Maximum number of paths passed to a single rustfmt invocation, keeping the
+# command line well under ARG_MAX.
+RUSTFMT_BATCH_SIZE = 200
+
+# Reads the `edition` key from Cargo.toml so rustfmt formats like cargo fmt would.
+EDITION_RE = re.compile(r'^\s*edition\s*=\s*"(?P<edition>\d+)"', re.MULTILINE)
+
+
+# Tests reuse a handful of variable names ("settings", "config"), so the
+# per-variable patterns are built once per name rather than once per declaration.
+@functools.lru_cache(maxsize=None)
+def _assignment_line_re(var_name: str) -> 're.Pattern[str]':
+    """
+    Build a pattern matching one `var.field = ...` line starting at a line boundary.
+
+    Whitespace is restricted to the current line so a match never spans lines.
+    """
+    return re.compile(
+        r'(?![^\S\n]*(?:let |fn |#\[|\n|\Z))'
+        r'(?P<line>(?P<indent>[^\S\n]*)[^\n]*?'
+        rf'\b{re.escape(var_name)}[^\S\n]*\.[^\S\n]*(?P<field>\w+)[^\S\n]*=[^\n]*)'
+        r'(?:\n|\Z)'
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _field_assignment_re(var_name: str) -> 're.Pattern[str]':
+    """Build a pattern matching a `var.field =` assignment within a single line."""
+    return re.compile(
+        rf'\b{re.escape(var_name)}[^\S\n]*\.[^\S\n]*(?P<field>\w+)[^\S\n]*='
+    )
+
+
+def _find_block_end(content: str, pos: int) -> int:
+    """Return the offset of the first boundary line at or after the line starting at pos."""
+    while pos < len(content):
+        line_end = content.find('\n', pos)
+        if line_end == -1:
+            line_end = len(content)
+        stripped = content[pos:line_end].lstrip()
+        if not stripped or stripped.startswith(BOUNDARY_PREFIXES):
+            return pos
+        pos = line_end + 1
+    return len(content)
+
+
+@contextlib.contextmanager
+def map_file(file_path: Path) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Map a file read-only so it can be searched and hashed without copying it.
+
+    Empty files cannot be mapped, so b'' is yielded for them instead.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def load_cache(cache_file: Path) -> Dict[str, str]:
+    """Load the no-change cache, returning an empty cache if it is missing or corrupt."""
+    import json
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file: Path, cache: Dict[str, str]) -> None:
+    """Persist the no-change cache. Failure to write it is not fatal."""
+    import json
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"Warning: could not write cache {cache_file}: {e}", file=sys.stderr)
+
+
+def cache_key(
+    raw_content: Union[mmap.mmap, bytes], field_name: str, field_value: str, is_option: bool
+) -> str:
+    """Key a file's content together with the requested edit and the script version."""
+    import hashlib
+    digest = hashlib.sha256(raw_content)
+    digest.update(repr((field_name, field_value, is_option, _SCRIPT_MTIME)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_atomic(file_path: Path, data: bytes) -> None:
+    """
+    Replace a file's contents without leaving it half-written if interrupted.
+
+    The data is written to a sibling temporary file which is then renamed over
+    the original, keeping the original's permissions.
+    """
+    import shutil
+    tmp_path = file_path.with_suffix(file_path.suffix + '.tmp')
+    try:
+        tmp_path.write_bytes(data)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _run_git(args: List[str]) -> Optional[str]:
+    """Run a git command and return its stdout, or None if git is unavailable or fails."""
+    try:
+        result = subprocess.run(['git', *args], capture_output=True, text=True, check=False)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def _walk_rust_files(directory: Path) -> List[Path]:
+    """Recursively collect .rs files, skipping build output and git metadata."""
+    rust_files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ('target', '.git'):
+                    rust_files.extend(_walk_rust_files(Path(entry.path)))
+            elif entry.name.endswith('.rs') and entry.is_file():
+                rust_files.append(Path(entry.path))
+    return rust_files
 
 
 def find_test_files(test_dir: Path) -> List[Path]:
-    """Find all Rust test files in the test directory."""
-    return list(test_dir.rglob("*.rs"))
+    """
+    Find all Rust test files in the test directory.
+
+    Inside a git checkout the files are listed from the index, plus untracked
+    files that are not ignored, instead of walking the directory tree.
+    Otherwise the directory is walked.
+    """
+    listing = _run_git([
+        'ls-files', '-z', '--cached', '--others', '--exclude-standard',
+        '--', str(test_dir / '*.rs'),
+    ])
+    if listing:
+        # Tracked files deleted from the working tree are still in the index
+        paths = dict.fromkeys(p for p in listing.split('\0') if p)
+        return [Path(p) for p in paths if os.path.isfile(p)]
+
+    return _walk_rust_files(test_dir)
+
+
+def find_changed_files(test_files: List[Path], base: str = 'HEAD') -> Optional[List[Path]]:
+    """
+    Restrict test files to those that differ from `base` or are untracked.
+
+    Returns:
+        The changed subset of test_files, or None if git could not be queried
+    """
+    toplevel = _run_git(['rev-parse', '--show-toplevel'])
+    diff = _run_git(['diff', '--name-only', '-z', base, '--'])
+    untracked = _run_git(['ls-files', '-z', '--others', '--exclude-standard'])
+    if toplevel is None or diff is None or untracked is None:
+        return None
+
+    # git diff reports paths relative to the repository root, ls-files
+    # relative to the current directory
+    root = Path(toplevel.strip())
+    changed = {(root / p).resolve() for p in diff.split('\0') if p}
+    changed.update(Path(p).resolve() for p in untracked.split('\0') if p)
+    return [path for path in test_files if path.resolve() in changed]
+
+
+def has_configurations(file_path: Path) -> bool:
+    """Check whether a file contains any AppSettings::default() declaration."""
+    try:
+        with map_file(file_path) as raw_content:
+            return raw_content.find(DEFAULT_MARKER) != -1
+    except OSError:
+        return False
+
+
+def field_still_missing(
+    file_paths: List[Path], field_name: str, field_value: str, is_option: bool
+) -> bool:
+    """
+    Check whether any configuration in the files lacks the field after updating.
+
+    The update is applied in memory before scanning, so the answer is the same
+    for a dry run, where the files were left untouched, as for a real run, where
+    the update is then a no-op.
+    """
+    for file_path in file_paths:
+        try:
+            with map_file(file_path) as raw_content:
+                if raw_content.find(DEFAULT_MARKER) == -1:
+                    continue
+                content = str(raw_content, 'utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+
+        updated_content, _ = find_and_update_configurations(
+            content, field_name, field_value, is_option
+        )
+        if any(field_name not in site.fields for site in scan(updated_content)):
+            return True
+
+    return False
+
+
+@dataclass
+class ConfigSite:
+    """An `AppSettings::default()` declaration and the field assignments that follow it."""
+
+    var_name: str
+    # Fields assigned to the variable anywhere in its block
+    fields: Set[str]
+    # Offset just past the last line of the run of assignment lines directly
+    # after the declaration, where a new assignment is inserted. None if the
+    # declaration is not followed by any assignment lines.
+    block_end: Optional[int]
+    # Indentation of that last assignment line
+    last_indent: str
+
+
+def scan(content: str) -> List[ConfigSite]:
+    """
+    Find every AppSettings configuration in the file content in a single pass.
+
+    A declaration's block runs from the end of the declaration up to the next
+    let, function, test attribute or empty line.
+    """
+    sites = []
+    resume = 0
+
+    for match in DEFAULT_RE.finditer(content):
+        # Only the first declaration on a line is considered, and lines inside
+        # an assignment run are not treated as new declarations
+        if match.start() < resume:
+            continue
+
+        var_name = match['var']
+        line_end = content.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(content)
+        resume = line_end
+
+        # Fields assigned on the rest of the declaration line
+        field_re = _field_assignment_re(var_name)
+        fields = {m['field'] for m in field_re.finditer(content, match.end(), line_end)}
+
+        # Follow the run of assignment lines to find the insertion point
+        assign_re = _assignment_line_re(var_name)
+        pos = min(line_end + 1, len(content))
+        last_assignment = None
+        while True:
+            assignment_match = assign_re.match(content, pos)
+            if not assignment_match:
+                break
+            fields.add(assignment_match['field'])
+            last_assignment = assignment_match
+            pos = assignment_match.end()
+
+        # The block carries on past the run up to the next boundary line. Lines
+        # in the run are already known not to be boundaries, so resume from
+        # there instead of rescanning them.
+        block_limit = _find_block_end(content, pos)
+        fields.update(m['field'] for m in field_re.finditer(content, pos, block_limit))
+
+        if last_assignment:
+            resume = last_assignment.end('line')
+            sites.append(ConfigSite(
+                var_name, fields, last_assignment.end('line'), last_assignment['indent']
+            ))
+        else:
+            sites.append(ConfigSite(var_name, fields, None, ''))
+
+    return sites
 
 
 def find_and_update_configurations(
@@ -46,140 +362,112 @@ def find_and_update_configurations(
     Returns:
         Tuple of (updated_content, number_of_changes)
     """
-    lines = content.split('\n')
-    updated_lines = []
-    i = 0
+    pieces = []
+    prev_end = 0
     changes = 0
 
-    while i < len(lines):
-        line = lines[i]
-        updated_lines.append(line)
-
-        # Look for AppSettings::default() declarations
-        match = re.search(r'let\s+(mut\s+)?(\w+)\s*=\s*AppSettings::default\(\)', line)
-        if match:
-            var_name = match.group(2)
-
-            # Collect subsequent field assignment lines
-            j = i + 1
-            assignment_lines = []
-
-            while j < len(lines):
-                next_line = lines[j]
-
-                # Stop conditions: another let, function, test attribute, or empty line followed by non-assignment
-                if re.match(r'\s*(let |fn |#\[|$)', next_line):
-                    break
-
-                # Check if this line has a field assignment to our variable
-                assignment_match = re.search(
-                    rf'\b{var_name}\s*\.\s*(\w+)\s*=', next_line
-                )
-                if assignment_match:
-                    # Check if this is the field we're trying to add
-                    if assignment_match.group(1) == field_name:
-                        # Field already exists, skip adding it
-                        assignment_lines = []
-                        j = i + 1  # Reset to continue after the declaration
-                        break
-
-                    assignment_lines.append((j, next_line))
-                    j += 1
-                else:
-                    # Not a field assignment to our variable
-                    break
-
-            # If we found assignment lines and the field doesn't exist, add it
-            if assignment_lines:
-                # Determine indentation from the last assignment line
-                last_assignment_line = assignment_lines[-1][1]
-                indent_match = re.match(r'(\s*)', last_assignment_line)
-                base_indent = indent_match.group(1) if indent_match else ''
-
-                # Prepare the value
-                value_to_insert = field_value
-                if is_option and field_value != 'None':
-                    value_to_insert = f'Some({field_value})'
-
-                # Create the new field assignment
-                new_field_line = f'{base_indent}{var_name}.{field_name} = {value_to_insert};'
-
-                # Insert after the last assignment line
-                insert_position = assignment_lines[-1][0] + 1
-
-                # Update lines list by inserting the new line
-                for idx, _ in assignment_lines:
-                    updated_lines.append(lines[idx])
-
-                updated_lines.append(new_field_line)
-                changes += 1
-
-                # Move i to after the insert position
-                i = insert_position - 1  # -1 because we'll increment at the end
-            else:
-                # No assignment lines found, or field already exists
-                # Just continue, we've already added the current line
-                pass
+    value_to_insert = field_value
+    if is_option and field_value != 'None':
+        value_to_insert = f'Some({field_value})'
+
+    for site in scan(content):
+        # Skip configurations that already set the field, or that have no
+        # assignment lines to add it after
+        if field_name in site.fields or site.block_end is None:
+            continue
 
-        i += 1
+        # Insert after the last assignment line, matching its indentation
+        new_field_line = f'{site.last_indent}{site.var_name}.{field_name} = {value_to_insert};'
+        pieces.append(content[prev_end:site.block_end])
+        pieces.append('\n' + new_field_line)
+        prev_end = site.block_end
+        changes += 1
 
-    return '\n'.join(updated_lines), changes
+    pieces.append(content[prev_end:])
+    return ''.join(pieces), changes
 
 
 def process_file(
-    file_path: Path, field_name: str, field_value: str, is_option: bool, dry_run: bool = False
-) -> bool:
+    file_path: Path,
+    field_name: str,
+    field_value: str,
+    is_option: bool,
+    dry_run: bool = False,
+    cache: Optional[Dict[str, str]] = None,
+) -> Tuple[bool, str]:
     """
     Process a single file to add the new field.
 
+    If a cache is given, files it records as unchanged for the same content and
+    edit are skipped without scanning, and newly unchanged files are recorded.
+
+    Output about the file is collected and returned rather than printed, so
+    files processed concurrently can be reported in a stable order.
+
     Returns:
-        True if file was modified, False otherwise
+        Tuple of (whether the file was modified, output to print for it)
     """
+    out = io.StringIO()
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
+        cache_path = str(file_path.resolve())
+        key = None
+        with map_file(file_path) as raw_content:
+            if cache is not None:
+                key = cache_key(raw_content, field_name, field_value, is_option)
+                if cache.get(cache_path) == key:
+                    return False, ''
+
+            if raw_content.find(DEFAULT_MARKER) == -1:
+                if key is not None:
+                    cache[cache_path] = key
+                return False, ''
+
+            # Decode straight from the mapping, only for files worth scanning
+            original_content = str(raw_content, 'utf-8')
 
         updated_content, changes = find_and_update_configurations(
             original_content, field_name, field_value, is_option
         )
 
-        if changes > 0:
+        if changes > 0 and updated_content != original_content:
             if dry_run:
-                print(f"Would modify: {file_path} ({changes} changes)")
+                out.write(f"Would modify: {file_path} ({changes} changes)\n")
                 # Show what changed
-                orig_lines = original_content.split('\n')
-                updated_lines = updated_content.split('\n')
-                for i, (orig, upd) in enumerate(zip(orig_lines, updated_lines)):
-                    if orig != upd:
-                        print(f"  Line {i+1}:")
-                        print(f"    - {orig}")
-                        print(f"    + {upd}")
-                        # Show a few lines of context
-                        for j in range(i+1, min(i+3, len(updated_lines))):
-                            if j < len(orig_lines) and j < len(updated_lines):
-                                if orig_lines[j] != updated_lines[j]:
-                                    print(f"    Line {j+1}: {updated_lines[j]}")
-                        break
+                import difflib
+                out.writelines(difflib.unified_diff(
+                    original_content.splitlines(keepends=True),
+                    updated_content.splitlines(keepends=True),
+                    fromfile=str(file_path),
+                    tofile=str(file_path),
+                    n=2
+                ))
             else:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(updated_content)
-                print(f"Updated: {file_path} ({changes} changes)")
+                write_atomic(file_path, updated_content.encode('utf-8'))
+                out.write(f"Updated: {file_path} ({changes} changes)\n")
 
-            return True
+            return True, out.getvalue()
         else:
-            return False
+            if key is not None:
+                cache[cache_path] = key
+            return False, ''
 
     except Exception as e:
-        print(f"Error processing {file_path}: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return False
+        with _print_lock:
+            print(f"Error processing {file_path}: {e}", file=sys.stderr)
+            import traceback
+            traceback.print_exc()
+        return False, ''
 
 
-def check_field_presence(test_files: List[Path], field_name: str) -> bool:
+def check_field_presence(
+    test_files: List[Path], field_name: str, fail_fast: bool = False
+) -> bool:
     """
     Check if the field is present in all AppSettings configurations.
 
+    With fail_fast, stop at the first configuration missing the field instead
+    of reporting every one.
+
     Returns:
         True if field is present in all configs, False otherwise
     """
@@ -187,40 +475,68 @@ def check_field_presence(test_files: List[Path], field_name: str) -> bool:
 
     for test_file in test_files:
         try:
-            with open(test_file, 'r') as f:
-                content = f.read()
-
-            # Find all AppSettings::default() patterns
-            default_matches = re.finditer(r'let\s+(mut\s+)?(\w+)\s*=\s*AppSettings::default\(\)', content)
-
-            for match in default_matches:
-                var_name = match.group(2)
-
-                # Look ahead for field assignments
-                start_pos = match.end()
-                remaining_content = content[start_pos:]
-
-                # Extract the block of assignments (until next let, fn, #[, or end)
-                lines_after = remaining_content.split('\n')
-                assignment_block = []
-                for line in lines_after:
-                    if re.match(r'\s*(let |fn |#\[|$)', line):
-                        break
-                    assignment_block.append(line)
-
-                # Check if our field is in the assignment block
-                block_text = '\n'.join(assignment_block)
-                if f'{var_name}.{field_name}' not in block_text:
+            with map_file(test_file) as raw_content:
+                if raw_content.find(DEFAULT_MARKER) == -1:
+                    continue
+                content = str(raw_content, 'utf-8')
+
+            for site in scan(content):
+                if field_name not in site.fields:
                     print(f"Missing field '{field_name}' in {test_file}")
+                    if fail_fast:
+                        return False
                     all_present = False
 
         except Exception as e:
             print(f"Error checking {test_file}: {e}", file=sys.stderr)
+            if fail_fast:
+                return False
             all_present = False
 
     return all_present
 
 
+def read_edition(crate_dir: Path) -> str:
+    """Read the Rust edition from the crate's Cargo.toml, defaulting to 2021."""
+    try:
+        match = EDITION_RE.search((crate_dir / 'Cargo.toml').read_text(encoding='utf-8'))
+    except OSError:
+        match = None
+    return match['edition'] if match else '2021'
+
+
+def format_files(file_paths: List[Path], crate_dir: Path) -> Tuple[bool, str]:
+    """
+    Format only the given files with rustfmt, in batches.
+
+    Falls back to running `cargo fmt` over the whole crate if rustfmt is not on
+    the PATH.
+
+    Returns:
+        Tuple of (success, error_output)
+    """
+    import shutil
+    if shutil.which('rustfmt') is None:
+        result = subprocess.run(
+            ['cargo', 'fmt'], cwd=crate_dir, capture_output=True, text=True
+        )
+        return result.returncode == 0, result.stderr
+
+    edition = read_edition(crate_dir)
+    errors = []
+    for start in range(0, len(file_paths), RUSTFMT_BATCH_SIZE):
+        batch = file_paths[start:start + RUSTFMT_BATCH_SIZE]
+        result = subprocess.run(
+            ['rustfmt', '--edition', edition, *map(str, batch)],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            errors.append(result.stderr)
+
+    return not errors, ''.join(errors)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Update test configurations when new fields are added to AppSettings'
@@ -251,6 +567,27 @@ def main():
         action='store_true',
         help='Check if the field is already present in all test configs (exit 1 if not)'
     )
+    parser.add_argument(
+        '--check-fast',
+        action='store_true',
+        help='Like --check, but stop at the first test config missing the field'
+    )
+    parser.add_argument(
+        '--incremental',
+        '--changed-only',
+        action='store_true',
+        help='Only process test files that differ from --base or are untracked (requires git)'
+    )
+    parser.add_argument(
+        '--base',
+        default='HEAD',
+        help='Git revision --incremental compares against (default: HEAD)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Rescan every file, ignoring and not updating {CACHE_FILE}'
+    )
 
     args = parser.parse_args()
 
@@ -268,10 +605,25 @@ def main():
 
     print(f"Found {len(test_files)} test files")
 
-    if args.check:
+    all_test_files = test_files
+    if args.incremental:
+        changed_files = find_changed_files(test_files, args.base)
+        if changed_files is None:
+            print(f"Warning: could not query git for changes against {args.base}, "
+                  "processing all test files", file=sys.stderr)
+        elif not any(has_configurations(path) for path in changed_files):
+            # Typically the field was just added to AppSettings and no test
+            # has been touched yet, so every configuration needs it
+            print("No changed test files contain AppSettings configurations, "
+                  "processing all test files")
+        else:
+            test_files = changed_files
+            print(f"Restricting to {len(test_files)} changed test files")
+
+    if args.check or args.check_fast:
         # Check mode: verify field exists in all configs
         print(f"Checking for field '{args.field}' in all test configurations...")
-        if check_field_presence(test_files, args.field):
+        if check_field_presence(test_files, args.field, fail_fast=args.check_fast):
             print(f"✓ Field '{args.field}' is present in all test configurations")
             sys.exit(0)
         else:
@@ -279,10 +631,42 @@ def main():
             sys.exit(1)
 
     # Update mode
-    modified_count = 0
-    for test_file in test_files:
-        if process_file(test_file, args.field, args.value, args.rust_option, args.dry_run):
-            modified_count += 1
+    cache_file = test_dir.parent.parent / CACHE_FILE
+    cache = None if args.no_cache else load_cache(cache_file)
+
+    # Test files are independent, so process them concurrently
+    import concurrent.futures
+
+    def process_files(file_paths: List[Path]) -> List[Tuple[bool, str]]:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(
+                lambda test_file: process_file(
+                    test_file, args.field, args.value, args.rust_option, args.dry_run, cache
+                ),
+                file_paths
+            ))
+
+    results = process_files(test_files)
+
+    # If the changed files still have configurations without the field (for
+    # example ones with no assignment lines to add it after), the restricted
+    # run has not done the job, so process the rest of the test files too
+    if test_files is not all_test_files and field_still_missing(
+        test_files, args.field, args.value, args.rust_option
+    ):
+        print("Changed test files still lack the field, processing all test files")
+        processed = set(test_files)
+        remaining_files = [path for path in all_test_files if path not in processed]
+        results += process_files(remaining_files)
+        test_files = test_files + remaining_files
+
+    for _, output in results:
+        sys.stdout.write(output)
+    modified_paths = [path for path, (modified, _) in zip(test_files, results) if modified]
+    modified_count = len(modified_paths)
+
+    if cache is not None:
+        save_cache(cache_file, cache)
 
     if args.dry_run:
         print(f"\nWould modify {modified_count} files")
@@ -290,20 +674,14 @@ def main():
         print(f"\nModified {modified_count} files")
 
         if modified_count > 0:
-            # Run cargo fmt to ensure proper formatting
-            print("\nRunning 'cargo fmt' to format updated files...")
-            import subprocess
-            result = subprocess.run(
-                ['cargo', 'fmt'],
-                cwd=test_dir.parent.parent,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
+            # Run rustfmt on the updated files to ensure proper formatting
+            print("\nRunning rustfmt to format updated files...")
+            formatted, errors = format_files(modified_paths, test_dir.parent.parent)
+            if formatted:
                 print("✓ Formatting complete!")
             else:
-                print("Warning: cargo fmt failed")
-                print(result.stderr)
+                print("Warning: rustfmt failed")
+                print(errors)
 
 
 if __name__ == '__main__':